@@ -6,17 +6,23 @@ Ensures complete separation: entire projects go to train OR test.
 
 import csv
 import re
-from collections import defaultdict
+from collections import namedtuple
+from functools import lru_cache
 from pathlib import Path
 
+_PROJECT_RE = re.compile(r'defects4j-([A-Za-z]+)-(\d+)')
 
+Pair = namedtuple('Pair', ['uid', 'groundtruth_index', 'expert_label'])
+
+
+@lru_cache(maxsize=None)
 def extract_project_and_bug(patch_name):
     """Extract project name and bug ID from patch filename.
     
     Example: 'historian-defects4j-Chart-1-rapgen-14.patch' 
              -> ('Chart', 'Chart-1')
     """
-    match = re.search(r'defects4j-([A-Za-z]+)-(\d+)', patch_name)
+    match = _PROJECT_RE.search(patch_name)
     if match:
         project = match.group(1)
         bug_id = f"{project}-{match.group(2)}"
@@ -31,24 +37,32 @@ def main():
     print("PROJECT-BASED TRAIN/TEST SPLIT")
     print("="*70)
     
-    # Read all pairs
-    print(f"\nReading {csv_file}...")
-    pairs = []
+    # Read pairs and group them by project in a single pass
+    print(f"\nReading {csv_file} and grouping pairs by project...")
+    project_to_pairs = {}
+    project_to_bugs = {}
+    pair_count = 0
+    
     with open(csv_file, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
-            pairs.append(row)
-    
-    print(f"Found {len(pairs)} pairs")
-    
-    # Group pairs by project
-    print("\nGrouping pairs by project...")
-    project_to_pairs = defaultdict(list)
-    
-    for pair in pairs:
-        project, bug_id = extract_project_and_bug(pair['uid'])
-        if project:
-            project_to_pairs[project].append(pair)
+            pair_count += 1
+            project, bug_id = extract_project_and_bug(row['uid'])
+            if project:
+                pair = Pair(
+                    row['uid'],
+                    row['groundtruth_index'],
+                    row.get('expert_label', '')
+                )
+                project_pairs = project_to_pairs.get(project)
+                if project_pairs is None:
+                    project_to_pairs[project] = [pair]
+                    project_to_bugs[project] = {bug_id}
+                else:
+                    project_pairs.append(pair)
+                    project_to_bugs[project].add(bug_id)
+    
+    print(f"Found {pair_count} pairs")
     
     # Show project statistics
     print(f"\nProject distribution:")
@@ -57,10 +71,7 @@ def main():
     
     project_stats = []
     for project, project_pairs in sorted(project_to_pairs.items()):
-        bugs = set()
-        for pair in project_pairs:
-            _, bug_id = extract_project_and_bug(pair['uid'])
-            bugs.add(bug_id)
+        bugs = project_to_bugs[project]
         
         project_stats.append({
             'project': project,
@@ -87,13 +98,17 @@ def main():
     target_test_ratio = 0.7  # 70% to test (like the paper - small gold set)
     target_test_pairs = int(total_pairs * target_test_ratio)
     
+    def _closer(count, size):
+        return abs(target_test_pairs - (count + size)) < abs(target_test_pairs - count)
+    
     test_projects = []
     train_projects = []
     test_pair_count = 0
     
-    # Greedy: add largest projects to test until we hit target
+    # Greedy: walk largest projects first and send each project to test only
+    # if that moves the test count closer to the target
     for stat in project_stats:
-        if test_pair_count < target_test_pairs:
+        if _closer(test_pair_count, stat['pairs']):
             test_projects.append(stat['project'])
             test_pair_count += stat['pairs']
         else:
@@ -115,9 +130,9 @@ def main():
     train_projects_alt = []
     test_pair_count_alt = 0
     
-    # Reverse: add smallest projects to test
+    # Reverse: same rule, walking smallest projects first
     for stat in reversed(project_stats):
-        if test_pair_count_alt < target_test_pairs:
+        if _closer(test_pair_count_alt, stat['pairs']):
             test_projects_alt.append(stat['project'])
             test_pair_count_alt += stat['pairs']
         else:
@@ -163,14 +178,14 @@ def main():
     print("WRITING FILES")
     print("="*70)
     
-    with open('labeled_pairs_train.csv', 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['uid', 'groundtruth_index', 'expert_label'])
-        writer.writeheader()
+    with open('labeled_pairs_train.csv', 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(Pair._fields)
         writer.writerows(train_pairs)
     
-    with open('labeled_pairs_test.csv', 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['uid', 'groundtruth_index', 'expert_label'])
-        writer.writeheader()
+    with open('labeled_pairs_test.csv', 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(Pair._fields)
         writer.writerows(test_pairs)
     
     print(f"\nFinal split:")